@@ -10,9 +10,11 @@ from ingest import bp_ingest
 
 
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__, static_folder='static', template_folder='templates')
     app.config.from_object(Config)
+    if test_config:
+        app.config.update(test_config)
 
 
     db.init_app(app)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Measure /api/today/latest payload size and response time for the keyed and
+columnar formats with a large roster, against a throwaway SQLite database.
+
+Client frame time is measured in the browser: open /dashboard?perf and watch
+the console for "[perf] frame ... ms, N rows patched".
+
+Usage:
+    python3 bench_dashboard.py --workers 500
+"""
+
+import argparse
+import gzip
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from app import create_app
+from database import db
+from models import DailyCheckin, today_date_str
+import readings_repo
+
+
+def timed_get(client, url, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        res = client.get(url)
+    return res, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_dashboard_')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'app.db')}"})
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        date_str = today_date_str()
+        for i in range(args.workers):
+            db.session.add(DailyCheckin(date_str=date_str, worker_id=f'W{i:04d}', full_name=f'Worker {i}', element_id=f'E{i:04d}'))
+        readings_repo.add_readings(
+            (f'E{i:04d}', round(rng.gauss(36.8, 0.6), 2), now - timedelta(seconds=rng.randint(0, 600)))
+            for i in range(args.workers)
+        )
+        db.session.commit()
+
+    client = app.test_client()
+    keyed, keyed_s = timed_get(client, '/api/today/latest', args.repeat)
+    columns, columns_s = timed_get(client, '/api/today/latest?format=columns', args.repeat)
+    version = columns.get_json()['version']
+    unchanged, unchanged_s = timed_get(client, f'/api/today/latest?format=columns&since={version}', args.repeat)
+
+    print(f"{args.workers} workers")
+    print(f"{'format':<22} {'bytes':>8} {'gzip':>7} {'ms':>8}")
+    for name, res, secs in (
+        ('keyed (default)', keyed, keyed_s),
+        ('columns', columns, columns_s),
+        ('columns, unchanged', unchanged, unchanged_s),
+    ):
+        print(f"{name:<22} {len(res.data):>8,} {len(gzip.compress(res.data)):>7,} {secs * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
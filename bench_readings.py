@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark readings storage layouts (single table vs monthly partitions).
+
+Generates synthetic readings spread evenly over a number of months, then
+reports insert rate, a one-day range query, a per-element month query,
+latest-reading lookups and retention of the oldest month.
+
+Usage:
+    python3 bench_readings.py --rows 1000000 --months 36
+    python3 bench_readings.py --rows 50000000 --months 60 --db-dir /data/bench
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def run_layout(layout, db_path, rows, months, elements, batch):
+    from flask import Flask
+    from config import Config
+    from database import db
+    import readings_repo
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['READINGS_LAYOUT'] = layout
+    db.init_app(app)
+
+    # Data ends now, so latest_reading uses its default (recent) window like
+    # the dashboard does
+    span = timedelta(days=30.4 * months)
+    start = datetime.utcnow() - span
+    step = span / rows
+    rng = random.Random(42)
+
+    with app.app_context():
+        db.create_all()
+        readings_repo.ensure_storage()
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        written = 0
+        while written < rows:
+            n = min(batch, rows - written)
+            readings_repo.add_readings(
+                (str(rng.randint(1, elements)), round(rng.uniform(35.0, 39.5), 2), start + step * (written + i))
+                for i in range(n)
+            )
+            db.session.commit()
+            written += n
+        insert_s = time.perf_counter() - t0
+
+        mid = start + span / 2
+        t0 = time.perf_counter()
+        day = readings_repo.readings_between(mid, mid + timedelta(days=1))
+        day_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        month = readings_repo.readings_between(mid, mid + timedelta(days=30), element_id='1')
+        month_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        latest = readings_repo.latest_readings([str(e) for e in range(1, elements + 1)])
+        latest_s = time.perf_counter() - t0
+        found = sum(1 for row in latest.values() if row is not None)
+        assert found == elements, f'latest lookups found {found} of {elements} elements'
+
+        # Drop the oldest (first) month
+        first_month = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        t0 = time.perf_counter()
+        readings_repo.drop_readings_before((first_month + timedelta(days=32)).replace(day=1))
+        db.session.commit()
+        prune_s = time.perf_counter() - t0
+
+    print(f"[{layout}]")
+    print(f"  insert        {rows / insert_s:12,.0f} rows/s  ({insert_s:.1f}s)")
+    print(f"  1-day range   {day_s * 1000:12.1f} ms  ({len(day)} rows)")
+    print(f"  30-day elem   {month_s * 1000:12.1f} ms  ({len(month)} rows)")
+    print(f"  latest x{elements:<4} {latest_s * 1000:12.1f} ms  ({found} found)")
+    print(f"  prune 1 month {prune_s * 1000:12.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--elements', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=20000)
+    parser.add_argument('--layout', choices=['single', 'monthly', 'both'], default='both')
+    parser.add_argument('--db-dir', default=None, help='directory for the benchmark databases')
+    args = parser.parse_args()
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix='bench_readings_')
+    layouts = ['single', 'monthly'] if args.layout == 'both' else [args.layout]
+    print(f"{args.rows:,} readings over {args.months} months, {args.elements} elements, db dir {db_dir}")
+    for layout in layouts:
+        db_path = os.path.join(db_dir, f'{layout}.db')
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        run_layout(layout, db_path, args.rows, args.months, args.elements, args.batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark spool append and replay throughput.
+
+Appends readings in fsync batches of different sizes, then replays the spool
+into a throwaway SQLite database.
+
+Usage:
+    python3 bench_spool.py --records 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from app import create_app
+from database import db
+from spool import Spool, replay, reading_record
+
+
+def bench_append(directory, records, batch):
+    spool = Spool(directory)
+    base = datetime(2025, 1, 1)
+    t0 = time.perf_counter()
+    for start in range(0, records, batch):
+        spool.append_many([
+            reading_record(str(i % 8 + 1), 36.5, base + timedelta(milliseconds=i))
+            for i in range(start, min(start + batch, records))
+        ])
+    elapsed = time.perf_counter() - t0
+    spool.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--replay-batch', type=int, default=5000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_spool_')
+    print(f"{args.records:,} records, tmp dir {tmp}")
+
+    for batch in (1, 100, 1000):
+        directory = os.path.join(tmp, f'spool-{batch}')
+        # fsync per record is slow; keep that case short
+        records = min(args.records, 2000) if batch == 1 else args.records
+        elapsed = bench_append(directory, records, batch)
+        print(f"  append batch={batch:<5} {records / elapsed:12,.0f} records/s  ({elapsed:.2f}s)")
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'app.db')}"})
+    with app.app_context():
+        db.create_all()
+        spool = Spool(os.path.join(tmp, 'spool-1000'))
+        t0 = time.perf_counter()
+        inserted = replay(spool, batch_size=args.replay_batch)
+        elapsed = time.perf_counter() - t0
+    print(f"  replay              {inserted / elapsed:12,.0f} records/s  ({elapsed:.2f}s, {inserted:,} inserted)")
+
+
+if __name__ == '__main__':
+    main()
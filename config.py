@@ -15,9 +15,19 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DB_URL", f"sqlite:///{DEFAULT_DB_PATH}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     TIMEZONE = "Africa/Lagos"
+    # Readings storage layout: 'single' (one table) or 'monthly' (partitioned)
+    READINGS_LAYOUT = os.getenv("READINGS_LAYOUT", "single")
+    # Readings that fail to commit are spooled here and replayed later; keep it
+    # on a different volume from the database to cover a read-only disk
+    SPOOL_DIR = os.getenv("SPOOL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "spool"))
+    SPOOL_DRAIN_INTERVAL = int(os.getenv("SPOOL_DRAIN_INTERVAL", "30"))  # seconds between replays from /api/ingest
+    SPOOL_DRAIN_BATCH = int(os.getenv("SPOOL_DRAIN_BATCH", "500"))  # readings replayed per /api/ingest drain
     INGEST_API_KEY = os.getenv("INGEST_API_KEY")
     
     # ThingSpeak API Configuration
     THINGSPEAK_READ_API_KEY = os.getenv("THINGSPEAK_READ_API_KEY", "YKWSHBBTJZP4EZ46")
     THINGSPEAK_WRITE_API_KEY = os.getenv("THINGSPEAK_WRITE_API_KEY", "RAPODLW686AVLMSN")
     THINGSPEAK_SERVER = "api.thingspeak.com"
+    THINGSPEAK_CHANNEL_ID = os.getenv("THINGSPEAK_CHANNEL_ID", "3022640")
+    # Override to point the sync service at a local fake server (see loadgen.py)
+    THINGSPEAK_URL = os.getenv("THINGSPEAK_URL", f"https://{THINGSPEAK_SERVER}")
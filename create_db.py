@@ -3,9 +3,12 @@
 # -------------------------------------------------
 from app import create_app
 from database import db
+import readings_repo
 
 
 app = create_app()
 with app.app_context():
     db.create_all()
+    readings_repo.ensure_storage()
+    db.session.commit()
     print('Database initialized.')
\ No newline at end of file
@@ -1,13 +1,48 @@
 # -------------------------------------------------
 # ingest.py (API endpoints for device/ThingSpeak)
 # -------------------------------------------------
-from flask import Blueprint, request, jsonify, abort
+import time
+from datetime import datetime
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy.exc import OperationalError
 from database import db
-from models import Reading
 from config import Config
+from spool import get_spool, replay
+import readings_repo
 
 
 bp_ingest = Blueprint('ingest', __name__, url_prefix='/api')
+_last_drain = 0.0
+
+
+def drain_spool():
+    """Replay spooled readings once the database accepts writes again.
+
+    Runs at most every SPOOL_DRAIN_INTERVAL seconds per process and replays a
+    single batch of SPOOL_DRAIN_BATCH readings, so a large backlog is drained
+    over many requests instead of blocking one device. Deployments without the
+    ThingSpeak sync service still get their spool drained. Called after the
+    device's reading is committed, so failures are logged and never fail the
+    request.
+    """
+    global _last_drain
+    now = time.monotonic()
+    if now - _last_drain < current_app.config.get('SPOOL_DRAIN_INTERVAL', 30):
+        return
+    _last_drain = now
+    try:
+        spool = get_spool(current_app.config.get('SPOOL_DIR'))
+        if not spool.has_pending():
+            return
+        replayed = replay(spool, batch_size=current_app.config.get('SPOOL_DRAIN_BATCH', 500), max_batches=1)
+        if replayed:
+            current_app.logger.info(f'Replayed {replayed} spooled readings')
+    except OperationalError as e:
+        db.session.rollback()
+        current_app.logger.warning(f'Spool replay deferred: {e}')
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Spool replay failed')
 
 
 @bp_ingest.post('/ingest')
@@ -40,9 +75,22 @@ def ingest():
         abort(400, description='element_id and temperature_c are required. Send either direct values or ThingSpeak field format.')
 
 
-    r = Reading(element_id=element_id, temperature_c=float(temperature_c))
-    db.session.add(r)
-    db.session.commit()
+    recorded_at = datetime.utcnow()
+    try:
+        reading_id, recorded_at = readings_repo.add_reading(element_id, float(temperature_c), recorded_at)
+        db.session.commit()
+    except OperationalError as e:
+        # Database locked or read-only: keep the reading on disk for replay
+        db.session.rollback()
+        current_app.logger.warning(f'Spooling reading for element {element_id}: {e}')
+        try:
+            get_spool(current_app.config.get('SPOOL_DIR')).append_reading(element_id, float(temperature_c), recorded_at)
+        except OSError as spool_error:
+            # Spool unwritable too (e.g. same read-only volume): let the device retry
+            current_app.logger.error(f'Could not spool reading for element {element_id}: {spool_error}')
+            return jsonify({'status': 'error', 'error': 'database and spool unavailable, retry later'}), 503
+        return jsonify({'status': 'spooled', 'id': None, 'recorded_at': recorded_at.isoformat() + 'Z'}), 202
 
+    drain_spool()
 
-    return jsonify({'status': 'ok', 'id': r.id, 'recorded_at': r.recorded_at.isoformat() + 'Z'})
\ No newline at end of file
+    return jsonify({'status': 'ok', 'id': reading_id, 'recorded_at': recorded_at.isoformat() + 'Z'})
\ No newline at end of file
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Load generator for hardware sizing: feed replay and device-fleet simulation.
+
+Everything runs against a local instance and a local fake ThingSpeak server;
+the real ThingSpeak is never contacted. Without --url a throwaway instance of
+the app (temporary SQLite database) is started in-process.
+
+Usage:
+    # Replay a recorded dump into /api/ingest at 100x speed
+    python3 loadgen.py replay feeds.json --warp 100
+
+    # Replay the same dump through ThingSpeakSync.sync_once() via the fake
+    # ThingSpeak; entries the service skips between polls count as errors
+    python3 loadgen.py replay feeds.json --via sync --warp 1000
+
+    # 200 devices x 8 fields every 10s (+/-2s jitter) for one minute
+    python3 loadgen.py fleet --devices 200 --interval 10 --jitter 2 --duration 60
+
+    # Double the fleet each step until it falls behind, errors or p99 give out
+    python3 loadgen.py saturate --start 50 --max-devices 12800 --step-duration 20
+
+    # Write a synthetic dump, or serve one as a fake ThingSpeak channel
+    python3 loadgen.py make-feeds feeds.json --entries 5000
+    python3 loadgen.py fake-thingspeak feeds.json --port 8765 --warp 10
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+from config import Config
+
+
+FIELDS = range(1, 9)
+
+
+# Results
+
+
+class Stats:
+    """Thread-safe collector of request outcomes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.ok = 0
+        self.spooled = 0
+        self.errors = 0
+        self.rows = 0
+        self.max_lag = 0.0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, latency, status, rows=1, lag=0.0):
+        with self.lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.max_lag = max(self.max_lag, lag)
+            if status == 200:
+                self.ok += 1
+                self.rows += rows
+            elif status == 202:
+                self.spooled += 1
+                self.rows += rows
+            else:
+                self.errors += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def total(self):
+        return self.ok + self.spooled + self.errors
+
+    @property
+    def error_rate(self):
+        return self.errors / self.total if self.total else 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def report(self, title):
+        print(f"{title}")
+        print(f"  requests      {self.total:,} ({self.ok:,} ok, {self.spooled:,} spooled, {self.errors:,} errors)")
+        print(f"  rows/sec      {self.rows_per_sec:,.1f}  ({self.rows:,} rows in {self.elapsed:.1f}s)")
+        print(f"  latency ms    p50 {self.percentile(50) * 1000:.1f}  p90 {self.percentile(90) * 1000:.1f}"
+              f"  p99 {self.percentile(99) * 1000:.1f}  max {self.percentile(100) * 1000:.1f}")
+        print(f"  error rate    {self.error_rate * 100:.2f}%")
+        print(f"  max send lag  {self.max_lag * 1000:.1f} ms")
+
+
+# Local targets
+
+
+def start_local_instance(workdir=None):
+    """Start the app on a free local port with a throwaway database."""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from app import create_app
+    from database import db
+    import readings_repo
+
+    workdir = workdir or tempfile.mkdtemp(prefix='loadgen_')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'app.db')}",
+        'SPOOL_DIR': os.path.join(workdir, 'spool'),
+    })
+    with app.app_context():
+        db.create_all()
+        readings_repo.ensure_storage()
+        db.session.commit()
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Local instance at {url} (data in {workdir})")
+    return app, server, url
+
+
+def parse_ts(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def load_feeds(path):
+    with open(path) as f:
+        data = json.load(f)
+    feeds = data['feeds'] if isinstance(data, dict) else data
+    return sorted((f for f in feeds if f.get('created_at')), key=lambda f: parse_ts(f['created_at']))
+
+
+class FakeThingSpeak:
+    """Serves a feeds dump as a ThingSpeak channel, released on a warped clock.
+
+    A feed becomes visible once (now - start) * warp has passed its offset from
+    the first feed. POST /update appends new entries like the write API.
+    """
+
+    def __init__(self, feeds=None, warp=1.0, channel_id=None, host='127.0.0.1', port=0):
+        self.feeds = list(feeds or [])
+        self.warp = warp
+        self.channel_id = str(channel_id or Config.THINGSPEAK_CHANNEL_ID)
+        self.lock = threading.Lock()
+        self.first_ts = parse_ts(self.feeds[0]['created_at']) if self.feeds else None
+        self.offsets = [(parse_ts(f['created_at']) - self.first_ts).total_seconds() for f in self.feeds]
+        self.next_entry_id = max((f.get('entry_id') or 0 for f in self.feeds), default=0) + 1
+        self.started = None
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.url = f"http://{host}:{self.server.server_port}"
+
+    def start(self):
+        self.started = time.perf_counter()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def visible_at(self, index):
+        """Wall-clock perf_counter time at which feed `index` is released."""
+        return self.started + self.offsets[index] / self.warp
+
+    def visible(self):
+        now = (time.perf_counter() - self.started) * self.warp
+        with self.lock:
+            return [f for f, o in zip(self.feeds, self.offsets) if o <= now]
+
+    def update(self, fields):
+        with self.lock:
+            feed = {'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'), 'entry_id': self.next_entry_id}
+            feed.update({f'field{n}': fields.get(f'field{n}') for n in FIELDS})
+            self.next_entry_id += 1
+            self.feeds.append(feed)
+            self.offsets.append(-1.0)
+            return feed['entry_id']
+
+    def _handler(self):
+        fake = self
+        feeds_re = re.compile(rf'^/channels/{re.escape(fake.channel_id)}/feeds(/last)?\.json$')
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, body, status=200):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == '/update':
+                    return self._send(fake.update({k: v[0] for k, v in query.items()}))
+                m = feeds_re.match(url.path)
+                if m and m.group(1):
+                    feeds = fake.visible()
+                    return self._send(feeds[-1] if feeds else -1)
+                if m:
+                    results = int(query.get('results', ['100'])[0])
+                    channel = {'id': int(fake.channel_id) if fake.channel_id.isdigit() else fake.channel_id}
+                    return self._send({'channel': channel, 'feeds': fake.visible()[-results:]})
+                self._send({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                if urlparse(self.path).path != '/update':
+                    return self._send({'error': 'not found'}, 404)
+                try:
+                    fields = json.loads(body)
+                except ValueError:
+                    fields = {k: v[0] for k, v in parse_qs(body).items()}
+                self._send(fake.update(fields))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+# Sending
+
+
+def run_schedule(events, url, key, workers, stats=None):
+    """POST (due_seconds, payload) events to /api/ingest as they fall due."""
+    stats = stats or Stats()
+    local = threading.local()
+    endpoint = f"{url}/api/ingest"
+    headers = {'X-INGEST-KEY': key} if key else {}
+
+    def send(due, payload):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        sent = time.perf_counter()
+        lag = max(0.0, sent - due)
+        try:
+            res = local.session.post(endpoint, json=payload, headers=headers, timeout=30)
+            status = res.status_code
+        except requests.RequestException:
+            status = None
+        stats.record(time.perf_counter() - sent, status, lag=lag)
+
+    start = time.perf_counter()
+    stats.started = start
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for offset, payload in events:
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, due, payload)
+    stats.stop()
+    return stats
+
+
+def replay_events(feeds, warp):
+    """One ingest request per non-empty field, spaced by the warped feed clock."""
+    if not feeds:
+        return []
+    first = parse_ts(feeds[0]['created_at'])
+    events = []
+    for feed in feeds:
+        offset = (parse_ts(feed['created_at']) - first).total_seconds() / warp
+        for n in FIELDS:
+            value = feed.get(f'field{n}')
+            if value is not None:
+                events.append((offset, {f'field{n}': value}))
+    return events
+
+
+def fleet_events(devices, interval, jitter, duration, seed=None):
+    """N devices x 8 fields posting every `interval` seconds with +/- jitter."""
+    rng = random.Random(seed)
+    events = []
+    for device in range(devices):
+        t = rng.uniform(0, interval)
+        while t < duration:
+            when = max(0.0, t + rng.uniform(-jitter, jitter))
+            for n in FIELDS:
+                events.append((when, {
+                    'element_id': f'dev{device:05d}-{n}',
+                    'temperature_c': round(rng.gauss(36.8, 0.6), 2),
+                }))
+            t += interval
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def replay_via_sync(feeds, warp, poll=None, workdir=None):
+    """Release feeds from a fake ThingSpeak and pull them with ThingSpeakSync.
+
+    Drives sync_once(), the path the deployed service runs, every `poll`
+    wall-clock seconds (default: the service's 30s interval in feed time).
+    sync_once() only reads feeds/last.json, so entries that arrive and are
+    superseded within one interval are never stored; they count as errors.
+    """
+    from thingspeak_sync import ThingSpeakSync
+
+    poll = poll if poll is not None else 30.0 / warp
+    fake = FakeThingSpeak(feeds, warp=warp)
+    app, server, _ = start_local_instance(workdir)
+    app.config['THINGSPEAK_URL'] = fake.url
+    app.config['THINGSPEAK_CHANNEL_ID'] = fake.channel_id
+    sync = ThingSpeakSync(app=app)
+    released = {f['entry_id']: i for i, f in enumerate(feeds) if f.get('entry_id')}
+    skipped = len(feeds) - len(released)
+    if skipped:
+        print(f"Skipping {skipped} feeds without entry_id (ThingSpeakSync ignores them)")
+    field_rows = {
+        entry_id: sum(1 for n in FIELDS if feeds[i].get(f'field{n}') is not None)
+        for entry_id, i in released.items()
+    }
+    stored = set()
+    stats = Stats()
+
+    fake.start()
+    stats.started = fake.started
+    last_release = fake.started + max(fake.offsets, default=0.0) / warp
+    try:
+        # One more cycle after the last feed is released, then stop
+        while True:
+            cycle = time.perf_counter()
+            final = cycle >= last_release
+            before = sync.last_entry_id
+            with redirect_stdout(io.StringIO()):
+                sync.sync_once()
+            if sync.last_entry_id > before and sync.last_entry_id in released:
+                entry_id = sync.last_entry_id
+                stored.add(entry_id)
+                stats.record(time.perf_counter() - fake.visible_at(released[entry_id]), 200,
+                             rows=field_rows[entry_id])
+            if final:
+                break
+            time.sleep(max(0.0, poll - (time.perf_counter() - cycle)))
+    finally:
+        fake.stop()
+        server.shutdown()
+
+    # Entries with readings that the service never stored were skipped
+    for entry_id, rows in field_rows.items():
+        if rows and entry_id not in stored:
+            stats.record(None, None, rows=rows)
+    stats.stop()
+    return stats
+
+
+# Commands
+
+
+def make_feeds(path, entries, period, elements, seed=None):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    feeds = []
+    for i in range(entries):
+        feed = {
+            'created_at': (start + timedelta(seconds=i * period)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'entry_id': i + 1,
+        }
+        for n in FIELDS:
+            feed[f'field{n}'] = f"{rng.gauss(36.8, 0.6):.2f}" if n <= elements else None
+        feeds.append(feed)
+    with open(path, 'w') as f:
+        json.dump({'channel': {'id': int(Config.THINGSPEAK_CHANNEL_ID)}, 'feeds': feeds}, f)
+    print(f"Wrote {entries} feeds ({entries * elements} readings) to {path}")
+
+
+def saturate(args, url):
+    """Double the fleet until the instance stops keeping up.
+
+    A step is saturated when the backlog takes longer than one posting
+    interval to drain after the last scheduled post, or the error rate or
+    p99 latency exceed their limits.
+    """
+    print(f"{'devices':>8} {'offered/s':>10} {'rows/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'drain s':>8}")
+    last_ok = None
+    devices = args.start
+    while devices <= args.max_devices:
+        offered = devices * len(FIELDS) / args.interval
+        events = fleet_events(devices, args.interval, args.jitter, args.step_duration, args.seed)
+        stats = run_schedule(events, url, args.key, args.workers)
+        # Time needed after the last scheduled post to finish the backlog
+        drain = stats.elapsed - events[-1][0] if events else 0.0
+        print(f"{devices:>8} {offered:>10.1f} {stats.rows_per_sec:>10.1f} {stats.percentile(50) * 1000:>8.1f}"
+              f" {stats.percentile(99) * 1000:>8.1f} {stats.error_rate * 100:>6.2f}% {drain:>8.2f}")
+        saturated = (
+            drain > args.interval
+            or stats.error_rate > args.max_error_rate
+            or stats.percentile(99) * 1000 > args.max_p99_ms
+        )
+        if saturated:
+            break
+        last_ok = (devices, stats.rows_per_sec)
+        devices *= 2
+
+    if last_ok is None:
+        print(f"Saturated at the first step ({args.start} devices)")
+    elif devices > args.max_devices:
+        print(f"No saturation up to {last_ok[0]} devices ({last_ok[1]:,.1f} rows/s)")
+    else:
+        print(f"Saturation point: between {last_ok[0]} and {devices} devices;"
+              f" sustained {last_ok[1]:,.1f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_target(p):
+        p.add_argument('--url', help='running instance (default: start a local throwaway instance)')
+        p.add_argument('--key', default=Config.INGEST_API_KEY, help='ingest API key')
+        p.add_argument('--workers', type=int, default=32, help='concurrent sender threads')
+        p.add_argument('--seed', type=int, default=None)
+
+    def add_fleet(p):
+        p.add_argument('--interval', type=float, default=10.0, help='seconds between posts per device')
+        p.add_argument('--jitter', type=float, default=1.0, help='+/- seconds of jitter per post')
+
+    p_replay = sub.add_parser('replay', help='replay a feeds.json dump')
+    p_replay.add_argument('feeds')
+    p_replay.add_argument('--warp', type=float, default=1.0, help='time-warp factor (1-1000)')
+    p_replay.add_argument('--via', choices=['ingest', 'sync'], default='ingest')
+    p_replay.add_argument('--poll', type=float, default=None,
+                          help='sync interval in wall-clock seconds (default: 30s of feed time, i.e. 30/warp)')
+    add_target(p_replay)
+
+    p_fleet = sub.add_parser('fleet', help='simulate N devices x 8 fields')
+    p_fleet.add_argument('--devices', type=int, default=100)
+    p_fleet.add_argument('--duration', type=float, default=60.0)
+    add_fleet(p_fleet)
+    add_target(p_fleet)
+
+    p_sat = sub.add_parser('saturate', help='ramp the fleet until the instance saturates')
+    p_sat.add_argument('--start', type=int, default=10)
+    p_sat.add_argument('--max-devices', type=int, default=10000)
+    p_sat.add_argument('--step-duration', type=float, default=20.0)
+    p_sat.add_argument('--max-error-rate', type=float, default=0.01)
+    p_sat.add_argument('--max-p99-ms', type=float, default=1000.0)
+    add_fleet(p_sat)
+    add_target(p_sat)
+
+    p_make = sub.add_parser('make-feeds', help='write a synthetic feeds.json dump')
+    p_make.add_argument('path')
+    p_make.add_argument('--entries', type=int, default=1000)
+    p_make.add_argument('--period', type=float, default=15.0, help='seconds between entries')
+    p_make.add_argument('--elements', type=int, default=8, choices=FIELDS)
+    p_make.add_argument('--seed', type=int, default=None)
+
+    p_fake = sub.add_parser('fake-thingspeak', help='serve a dump as a local fake ThingSpeak channel')
+    p_fake.add_argument('feeds', nargs='?')
+    p_fake.add_argument('--warp', type=float, default=1.0)
+    p_fake.add_argument('--port', type=int, default=8765)
+
+    args = parser.parse_args()
+
+    if args.command == 'make-feeds':
+        return make_feeds(args.path, args.entries, args.period, args.elements, args.seed)
+
+    if args.command == 'fake-thingspeak':
+        fake = FakeThingSpeak(load_feeds(args.feeds) if args.feeds else [], warp=args.warp, port=args.port).start()
+        print(f"Fake ThingSpeak channel {fake.channel_id} at {fake.url} (set THINGSPEAK_URL={fake.url})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            fake.stop()
+        return
+
+    if args.command == 'replay' and not 1 <= args.warp <= 1000:
+        parser.error('--warp must be between 1 and 1000')
+
+    if args.command == 'replay' and args.via == 'sync':
+        feeds = load_feeds(args.feeds)
+        stats = replay_via_sync(feeds, args.warp, args.poll)
+        return stats.report(f"Replay of {len(feeds)} feeds through ThingSpeakSync at {args.warp:g}x")
+
+    server = None
+    url = args.url
+    if not url:
+        _, server, url = start_local_instance()
+    try:
+        if args.command == 'replay':
+            feeds = load_feeds(args.feeds)
+            stats = run_schedule(replay_events(feeds, args.warp), url, args.key, args.workers)
+            stats.report(f"Replay of {len(feeds)} feeds into /api/ingest at {args.warp:g}x")
+        elif args.command == 'fleet':
+            events = fleet_events(args.devices, args.interval, args.jitter, args.duration, args.seed)
+            stats = run_schedule(events, url, args.key, args.workers)
+            stats.report(f"Fleet of {args.devices} devices x 8 fields every {args.interval:g}s"
+                         f" (offered {args.devices * len(FIELDS) / args.interval:,.1f} rows/s)")
+        else:
+            saturate(args, url)
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Readings storage maintenance: migration to the monthly layout and retention.
+
+Usage:
+    READINGS_LAYOUT=monthly python3 manage_readings.py migrate [--batch 50000] [--drop-legacy]
+    READINGS_LAYOUT=monthly python3 manage_readings.py prune --before 2024-01
+    python3 manage_readings.py partitions
+"""
+
+import argparse
+from datetime import datetime
+from sqlalchemy import select
+from app import create_app
+from database import db
+from models import Reading
+import readings_repo
+
+
+def migrate(batch_size=50000, drop_legacy=False):
+    """Copy the single `readings` table into monthly partitions.
+
+    Rows are copied in id order in batches; each batch is committed together
+    with its deletion from the legacy table, so the migration can be stopped
+    and re-run without duplicating readings.
+    """
+    if readings_repo.current_layout() != 'monthly':
+        print("Set READINGS_LAYOUT=monthly before migrating")
+        return
+
+    readings_repo.ensure_storage()
+    table = Reading.__table__
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.element_id, table.c.temperature_c, table.c.recorded_at)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        readings_repo.add_readings(
+            (r.element_id, r.temperature_c, r.recorded_at or datetime.utcnow()) for r in rows
+        )
+        db.session.execute(table.delete().where(table.c.id <= rows[-1].id))
+        db.session.commit()
+        moved += len(rows)
+        print(f"Migrated {moved} readings")
+
+    if drop_legacy:
+        table.drop(bind=db.engine)
+        print("Dropped legacy readings table")
+    print(f"Migration complete: {moved} readings in {len(readings_repo.list_partitions())} partitions")
+
+
+def prune(before):
+    cutoff = datetime.strptime(before, '%Y-%m')
+    removed = readings_repo.drop_readings_before(cutoff)
+    db.session.commit()
+    unit = 'partitions' if readings_repo.current_layout() == 'monthly' else 'readings'
+    print(f"Removed {removed} {unit} older than {cutoff:%Y-%m}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_migrate = sub.add_parser('migrate', help='move the single readings table into monthly partitions')
+    p_migrate.add_argument('--batch', type=int, default=50000)
+    p_migrate.add_argument('--drop-legacy', action='store_true', help='drop the emptied readings table')
+
+    p_prune = sub.add_parser('prune', help='drop readings older than a month (YYYY-MM)')
+    p_prune.add_argument('--before', required=True)
+
+    sub.add_parser('partitions', help='list monthly partitions')
+
+    args = parser.parse_args()
+    app = create_app()
+    with app.app_context():
+        if args.command == 'migrate':
+            migrate(args.batch, args.drop_legacy)
+        elif args.command == 'prune':
+            prune(args.before)
+        else:
+            for name in readings_repo.list_partitions():
+                start, end = readings_repo.partition_bounds(name)
+                print(f"{name}  {start:%Y-%m-%d} .. {end:%Y-%m-%d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+# -------------------------------------------------
+# readings_repo.py (storage layer for temperature readings)
+# -------------------------------------------------
+# All reads and writes of temperature readings go through this module so the
+# physical layout stays hidden from ingest, ThingSpeakSync and the views.
+#
+# Layouts (Config.READINGS_LAYOUT):
+#   single  - the original monolithic `readings` table (models.Reading)
+#   monthly - one table per UTC month, `readings_YYYYMM`. On SQLite these are
+#             plain tables and queries only touch the months they need; on
+#             Postgres they are native partitions of `readings_partitioned`
+#             and the planner prunes them. Reading ids are only unique per
+#             partition on SQLite: identify a reading by (id, recorded_at).
+#
+# Callers own the transaction: writes go through db.session and are made
+# durable by the caller's db.session.commit().
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from flask import current_app
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, BigInteger, MetaData, String,
+    Table, desc, event, inspect, insert, select, text, union_all, literal_column,
+)
+from sqlalchemy.orm import Session
+
+from database import db
+from models import Reading
+
+
+PARTITION_RE = re.compile(r'^readings_(\d{4})(\d{2})$')
+PG_PARENT = 'readings_partitioned'
+
+# Partition tables live in their own metadata so db.create_all() never tries
+# to create them.
+_metadata = MetaData()
+_known_partitions = {}
+
+
+# Helpers
+
+
+def current_layout():
+    return current_app.config.get('READINGS_LAYOUT', 'single')
+
+
+def _is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def to_utc_naive(ts):
+    """Readings are stored as naive UTC, like models.Reading.recorded_at."""
+    if ts is None:
+        return datetime.utcnow()
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _month_start(ts):
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(ts):
+    start = _month_start(ts)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(ts):
+    return f'readings_{ts:%Y%m}'
+
+
+def partition_bounds(name):
+    """Return the [start, end) UTC range covered by a partition table."""
+    m = PARTITION_RE.match(name)
+    start = datetime(int(m.group(1)), int(m.group(2)), 1)
+    return start, _next_month(start)
+
+
+def _partition_table(name):
+    if name not in _metadata.tables:
+        Table(
+            name, _metadata,
+            Column('id', Integer, primary_key=True),
+            Column('element_id', String(64), nullable=False),
+            Column('temperature_c', Float, nullable=False),
+            Column('recorded_at', DateTime, nullable=False),
+            Index(f'ix_{name}_element_recorded', 'element_id', 'recorded_at'),
+            Index(f'ix_{name}_recorded_at', 'recorded_at'),
+        )
+    return _metadata.tables[name]
+
+
+def _pg_parent_table():
+    if PG_PARENT not in _metadata.tables:
+        Table(
+            PG_PARENT, _metadata,
+            Column('id', BigInteger, primary_key=True, autoincrement=True),
+            Column('element_id', String(64), nullable=False),
+            Column('temperature_c', Float, nullable=False),
+            Column('recorded_at', DateTime, primary_key=True),
+        )
+    return _metadata.tables[PG_PARENT]
+
+
+def _cache_key():
+    return str(db.engine.url)
+
+
+def _catalog_partitions():
+    names = inspect(db.session.connection()).get_table_names()
+    return {n for n in names if PARTITION_RE.match(n)}
+
+
+def _partition_set():
+    """Partitions known to this process; only used to skip CREATE on writes."""
+    key = _cache_key()
+    if key not in _known_partitions:
+        _known_partitions[key] = _catalog_partitions()
+    return _known_partitions[key]
+
+
+def list_partitions():
+    """Existing monthly partitions, oldest first.
+
+    Always read from the catalog, since another process (e.g. a prune run)
+    may have dropped partitions since this one last looked.
+    """
+    names = _catalog_partitions()
+    _known_partitions[_cache_key()] = set(names)
+    return sorted(names)
+
+
+def _forget_partitions():
+    _known_partitions.pop(_cache_key(), None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_partition_cache(session):
+    # A rolled back CREATE TABLE must not stay in the cache.
+    _known_partitions.clear()
+
+
+def ensure_storage():
+    """Create the tables required by the configured layout."""
+    if current_layout() != 'monthly' or not _is_postgres():
+        return
+    conn = db.session.connection()
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {PG_PARENT} ('
+        ' id BIGSERIAL,'
+        ' element_id VARCHAR(64) NOT NULL,'
+        ' temperature_c DOUBLE PRECISION NOT NULL,'
+        ' recorded_at TIMESTAMP NOT NULL,'
+        ' PRIMARY KEY (id, recorded_at)'
+        ') PARTITION BY RANGE (recorded_at)'
+    ))
+    conn.execute(text(
+        f'CREATE INDEX IF NOT EXISTS ix_{PG_PARENT}_element_recorded'
+        f' ON {PG_PARENT} (element_id, recorded_at)'
+    ))
+
+
+def ensure_partition(ts):
+    """Create the partition holding `ts` if it does not exist yet."""
+    name = partition_name(ts)
+    if name in _partition_set():
+        return name
+    conn = db.session.connection()
+    if _is_postgres():
+        ensure_storage()
+        start, end = partition_bounds(name)
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PG_PARENT}'
+            f" FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+    else:
+        _partition_table(name).create(bind=conn, checkfirst=True)
+    _partition_set().add(name)
+    return name
+
+
+def _partitions_between(start=None, end=None, partitions=None):
+    """Partitions overlapping [start, end), newest first.
+
+    `partitions` is a list from list_partitions() to reuse instead of reading
+    the catalog again.
+    """
+    names = []
+    for name in reversed(partitions if partitions is not None else list_partitions()):
+        p_start, p_end = partition_bounds(name)
+        if start is not None and p_end <= start:
+            continue
+        if end is not None and p_start >= end:
+            continue
+        names.append(name)
+    return names
+
+
+def _write_table(ts):
+    """Table that an insert for `ts` should target."""
+    if current_layout() != 'monthly':
+        return Reading.__table__
+    name = ensure_partition(ts)
+    if _is_postgres():
+        return _pg_parent_table()
+    return _partition_table(name)
+
+
+# Writes
+
+
+def add_reading(element_id, temperature_c, recorded_at=None):
+    """Insert one reading. Returns (id, recorded_at).
+
+    In the monthly SQLite layout each partition numbers its rows from 1, so
+    the id is only unique together with recorded_at (which names the month).
+    """
+    ts = to_utc_naive(recorded_at)
+    table = _write_table(ts)
+    result = db.session.execute(insert(table).values(
+        element_id=str(element_id),
+        temperature_c=float(temperature_c),
+        recorded_at=ts,
+    ))
+    return result.inserted_primary_key[0], ts
+
+
+def add_readings(rows):
+    """Bulk insert (element_id, temperature_c, recorded_at) tuples.
+
+    Rows are grouped per target table and sent as one executemany each.
+    Returns the number of rows inserted.
+    """
+    grouped = {}
+    tables = {}
+    for element_id, temperature_c, recorded_at in rows:
+        ts = to_utc_naive(recorded_at)
+        month = (ts.year, ts.month)
+        if month not in tables:
+            tables[month] = _write_table(ts)
+        grouped.setdefault(tables[month], []).append({
+            'element_id': str(element_id),
+            'temperature_c': float(temperature_c),
+            'recorded_at': ts,
+        })
+    count = 0
+    for table, values in grouped.items():
+        db.session.execute(insert(table), values)
+        count += len(values)
+    return count
+
+
+# Reads
+
+
+def _select_from(table, start=None, end=None, element_id=None):
+    q = select(
+        table.c.element_id, table.c.temperature_c, table.c.recorded_at,
+    )
+    if element_id is not None:
+        q = q.where(table.c.element_id == str(element_id))
+    if start is not None:
+        q = q.where(table.c.recorded_at >= start)
+    if end is not None:
+        q = q.where(table.c.recorded_at < end)
+    return q
+
+
+def reading_exists(element_id, recorded_at):
+    ts = to_utc_naive(recorded_at)
+    if current_layout() != 'monthly':
+        table = Reading.__table__
+    elif _is_postgres():
+        table = _pg_parent_table()
+    elif partition_name(ts) in _catalog_partitions():
+        table = _partition_table(partition_name(ts))
+    else:
+        return False
+    q = select(table.c.id).where(
+        table.c.element_id == str(element_id), table.c.recorded_at == ts,
+    ).limit(1)
+    return db.session.execute(q).first() is not None
+
+
+def latest_reading(element_id, since=None, partitions=None):
+    """Most recent reading for an element, or None.
+
+    The monthly layout only looks back to `since`, by default the start of the
+    previous month, so elements without recent readings cost at most two
+    partition lookups instead of one per month of history. The SQLite
+    partitions are scanned newest first and the scan stops at the first hit.
+    Pass `partitions` (from list_partitions()) to skip the catalog query, or
+    use latest_readings() for several elements.
+    """
+    if current_layout() != 'monthly':
+        table = Reading.__table__
+        q = _select_from(table, element_id=element_id)
+        return db.session.execute(q.order_by(desc(table.c.recorded_at)).limit(1)).first()
+
+    if since is None:
+        since = _month_start(_month_start(datetime.utcnow()) - timedelta(days=1))
+    since = to_utc_naive(since)
+
+    if _is_postgres():
+        table = _pg_parent_table()
+        q = _select_from(table, start=since, element_id=element_id)
+        return db.session.execute(q.order_by(desc(table.c.recorded_at)).limit(1)).first()
+
+    for name in _partitions_between(since, partitions=partitions):
+        table = _partition_table(name)
+        q = _select_from(table, start=since, element_id=element_id)
+        row = db.session.execute(q.order_by(desc(table.c.recorded_at)).limit(1)).first()
+        if row is not None:
+            return row
+    return None
+
+
+def latest_readings(element_ids, since=None):
+    """Map each element id to its most recent reading (or None).
+
+    Reads the partition list once for all elements, so a dashboard poll costs
+    one query per element rather than two.
+    """
+    partitions = None
+    if current_layout() == 'monthly' and not _is_postgres():
+        partitions = list_partitions()
+    return {
+        element_id: latest_reading(element_id, since=since, partitions=partitions)
+        for element_id in element_ids
+    }
+
+
+def readings_between(start, end, element_id=None):
+    """Readings with start <= recorded_at < end, oldest first."""
+    start = to_utc_naive(start) if start is not None else None
+    end = to_utc_naive(end) if end is not None else None
+
+    if current_layout() != 'monthly' or _is_postgres():
+        table = Reading.__table__ if current_layout() != 'monthly' else _pg_parent_table()
+        q = _select_from(table, start, end, element_id)
+        return db.session.execute(q.order_by(table.c.recorded_at)).all()
+
+    parts = [
+        _select_from(_partition_table(name), start, end, element_id)
+        for name in _partitions_between(start, end)
+    ]
+    if not parts:
+        return []
+    q = parts[0] if len(parts) == 1 else union_all(*parts)
+    q = q.order_by(literal_column('recorded_at'))
+    return db.session.execute(q).all()
+
+
+# Retention
+
+
+def drop_readings_before(cutoff):
+    """Discard readings older than `cutoff`.
+
+    The monthly layout drops whole partitions whose range ends on or before
+    the cutoff, so the cutoff is effectively rounded down to a month start.
+    Returns the number of partitions dropped (monthly) or rows deleted (single).
+    """
+    cutoff = to_utc_naive(cutoff)
+    if current_layout() != 'monthly':
+        table = Reading.__table__
+        result = db.session.execute(table.delete().where(table.c.recorded_at < cutoff))
+        return result.rowcount
+
+    conn = db.session.connection()
+    dropped = 0
+    for name in list_partitions():
+        if partition_bounds(name)[1] <= cutoff:
+            conn.execute(text(f'DROP TABLE IF EXISTS {name}'))
+            if name in _metadata.tables:
+                _metadata.remove(_metadata.tables[name])
+            dropped += 1
+    _forget_partitions()
+    return dropped
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Durable on-disk spool for readings that could not be committed.
+
+When the database is locked or briefly read-only, ingest and ThingSpeakSync
+append their readings here instead of dropping them. The replayer drains the
+spool into the database in bulk once it accepts writes again.
+
+Layout (Config.SPOOL_DIR):
+    segment-000001.log ...  append-only segments, rolled over at SEGMENT_BYTES
+    offset.json             replay position {"segment": ..., "offset": ...}
+    spool.lock              flock shared by writers and the replayer
+    replay.lock             held by whichever process is replaying
+
+Each record is framed as MAGIC | length | crc32 | JSON payload. Segments are
+read through mmap; a torn or corrupt frame is skipped by scanning forward to
+the next MAGIC, so a crash mid-write never blocks later records.
+
+Usage:
+    python3 spool.py --replay
+    python3 spool.py
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import zlib
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+from config import Config
+from database import db
+import readings_repo
+
+
+MAGIC = b'TSPL'
+HEADER = struct.Struct('<4sII')  # magic, payload length, crc32
+SEGMENT_BYTES = 16 * 1024 * 1024
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+
+
+def encode_frame(record):
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_frames(buf, offset=0):
+    """Yield (record, end_offset) for every valid frame in `buf` from `offset`.
+
+    Invalid bytes (torn tail, bad CRC) are skipped up to the next MAGIC.
+    """
+    size = len(buf)
+    while offset + HEADER.size <= size:
+        magic, length, crc = HEADER.unpack_from(buf, offset)
+        start = offset + HEADER.size
+        end = start + length
+        if magic == MAGIC and end <= size:
+            payload = buf[start:end]
+            if zlib.crc32(payload) == crc:
+                try:
+                    yield json.loads(payload), end
+                    offset = end
+                    continue
+                except ValueError:
+                    pass
+        nxt = buf.find(MAGIC, offset + 1)
+        if nxt < 0:
+            return
+        offset = nxt
+
+
+class Spool:
+    def __init__(self, directory=None, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory or Config.SPOOL_DIR
+        self.segment_bytes = segment_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._fd = None
+        self._fd_segment = None
+
+    # Files
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def segments(self):
+        """Segment file names, oldest first."""
+        return sorted(
+            n for n in os.listdir(self.directory)
+            if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _segment_name(self, seq):
+        return f'{SEGMENT_PREFIX}{seq:06d}{SEGMENT_SUFFIX}'
+
+    @contextmanager
+    def _locked(self):
+        with open(self._path('spool.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _replaying(self):
+        """Non-blocking lock so only one process replays at a time."""
+        with open(self._path('replay.lock'), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _fsync_dir(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _active_fd(self):
+        """Descriptor for the newest segment, rolling over when it is full."""
+        segments = self.segments()
+        if segments and os.path.getsize(self._path(segments[-1])) < self.segment_bytes:
+            name = segments[-1]
+        else:
+            seq = int(segments[-1][len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) + 1 if segments else 1
+            name = self._segment_name(seq)
+        if name != self._fd_segment:
+            self.close()
+            self._fd = os.open(self._path(name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fd_segment = name
+            self._fsync_dir()
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._fd_segment = None
+
+    # Writes
+
+    def append_many(self, records):
+        """Append records and fsync once for the whole batch."""
+        data = b''.join(encode_frame(r) for r in records)
+        if not data:
+            return 0
+        with self._locked():
+            fd = self._active_fd()
+            os.write(fd, data)
+            os.fsync(fd)
+        return len(records)
+
+    def append_reading(self, element_id, temperature_c, recorded_at):
+        return self.append_many([reading_record(element_id, temperature_c, recorded_at)])
+
+    # Replay position
+
+    def load_offset(self):
+        try:
+            with open(self._path('offset.json')) as f:
+                state = json.load(f)
+            return state['segment'], state['offset']
+        except (OSError, ValueError, KeyError):
+            return None, 0
+
+    def save_offset(self, segment, offset):
+        tmp = self._path('offset.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'segment': segment, 'offset': offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path('offset.json'))
+        self._fsync_dir()
+
+    # Reads
+
+    def read_from(self, segment, offset):
+        """Yield (segment, record, end_offset) after the given position."""
+        for name in self.segments():
+            if segment is not None and name < segment:
+                continue
+            start = offset if name == segment else 0
+            with open(self._path(name), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size <= start:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    for record, end in iter_frames(buf, start):
+                        yield name, record, end
+
+    def has_pending(self):
+        """Cheap check (file sizes only) for records past the replay offset."""
+        segment, offset = self.load_offset()
+        for name in self.segments():
+            if segment is None or name > segment:
+                if os.path.getsize(self._path(name)) > 0:
+                    return True
+            elif name == segment and os.path.getsize(self._path(name)) > offset:
+                return True
+        return False
+
+    def pending(self):
+        segment, offset = self.load_offset()
+        return sum(1 for _ in self.read_from(segment, offset))
+
+    def discard_replayed(self):
+        """Delete fully replayed segments; the newest one is kept for writers."""
+        segment, _ = self.load_offset()
+        if segment is None:
+            return 0
+        removed = 0
+        with self._locked():
+            segments = self.segments()
+            for name in segments[:-1]:
+                if name < segment:
+                    os.remove(self._path(name))
+                    removed += 1
+        return removed
+
+
+def replay(spool, batch_size=5000, max_batches=None):
+    """Drain spooled readings into the database. Needs an app context.
+
+    With max_batches, stops after that many batches and leaves the rest for
+    the next call. Each batch is inserted and committed before the offset moves past it. A
+    crash between the commit and the offset write replays that batch again,
+    so readings already in the database are filtered out first.
+    Returns the number of readings inserted, 0 if another process is already
+    replaying.
+    """
+    with spool._replaying() as acquired:
+        if not acquired:
+            return 0
+        return _replay(spool, batch_size, max_batches)
+
+
+def _replay(spool, batch_size, max_batches=None):
+    segment, offset = spool.load_offset()
+    inserted = 0
+    flushed = 0
+    batch = []
+    position = (segment, offset)
+
+    def flush():
+        rows = [
+            (rec['element_id'], rec['temperature_c'], readings_repo.to_utc_naive(datetime.fromisoformat(rec['recorded_at'])))
+            for rec in batch
+        ]
+        # One range query per batch finds readings that are already stored
+        first = min(r[2] for r in rows)
+        last = max(r[2] for r in rows)
+        seen = {
+            (r.element_id, r.recorded_at)
+            for r in readings_repo.readings_between(first, last + timedelta(microseconds=1))
+        }
+        # The same reading can be spooled twice (e.g. a sync restart while
+        # the database is still locked), so also drop repeats within the batch
+        unique = []
+        for row in rows:
+            key = (row[0], row[2])
+            if key not in seen:
+                seen.add(key)
+                unique.append(row)
+        rows = unique
+        count = readings_repo.add_readings(rows)
+        db.session.commit()
+        spool.save_offset(*position)
+        batch.clear()
+        return count
+
+    with closing(spool.read_from(segment, offset)) as frames:
+        for name, record, end in frames:
+            batch.append(record)
+            position = (name, end)
+            if len(batch) >= batch_size:
+                inserted += flush()
+                flushed += 1
+                if max_batches and flushed >= max_batches:
+                    break
+    if batch:
+        inserted += flush()
+    spool.discard_replayed()
+    return inserted
+
+
+_spools = {}
+
+
+def get_spool(directory=None):
+    """Per-process Spool for a directory (defaults to Config.SPOOL_DIR)."""
+    directory = directory or Config.SPOOL_DIR
+    if directory not in _spools:
+        _spools[directory] = Spool(directory)
+    return _spools[directory]
+
+
+def reading_record(element_id, temperature_c, recorded_at):
+    return {
+        'element_id': str(element_id),
+        'temperature_c': float(temperature_c),
+        'recorded_at': recorded_at.isoformat(),
+    }
+
+
+def main():
+    import sys
+    from app import create_app
+
+    spool = get_spool()
+    if len(sys.argv) > 1 and sys.argv[1] == '--replay':
+        with create_app().app_context():
+            print(f"Replayed {replay(spool)} spooled readings")
+    else:
+        print(f"Spool dir: {spool.directory}")
+        print(f"Segments: {len(spool.segments())}")
+        print(f"Pending records: {spool.pending()}")
+
+
+if __name__ == '__main__':
+    main()
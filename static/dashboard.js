@@ -1,3 +1,31 @@
+// Version of the last payload and the values each row was last rendered with,
+// so unchanged rows are never rewritten (and their animations not restarted)
+let latestVersion = null;
+const renderedRows = new Map();
+const rowCache = new Map();
+const pendingRows = new Map();
+let pendingStats = null;
+let frameRequested = false;
+
+// Add ?perf to the dashboard URL to log payload size and frame write time
+const PERF = new URLSearchParams(window.location.search).has('perf');
+
+function getRowCells(workerId) {
+    let cells = rowCache.get(workerId);
+    if (!cells || !cells.row.isConnected) {
+        const row = document.querySelector(`tr[data-worker-id="${workerId}"]`);
+        if (!row) return null;
+        cells = {
+            row,
+            tempCell: row.querySelector('.temp'),
+            timeCell: row.querySelector('.time'),
+            statusCell: row.querySelector('.status'),
+        };
+        rowCache.set(workerId, cells);
+    }
+    return cells;
+}
+
 async function fetchLatest() {
     try {
         // Show refresh indicator
@@ -6,117 +34,44 @@ async function fetchLatest() {
             refreshIndicator.style.display = 'inline-block';
         }
         
-        const res = await fetch('/api/today/latest');
+        let url = '/api/today/latest?format=columns';
+        if (latestVersion) {
+            url += `&since=${encodeURIComponent(latestVersion)}`;
+        }
+        const res = await fetch(url);
         if (!res.ok) return;
-        const data = await res.json();
-        
-        let totalTemps = [];
-        let feverCount = 0;
+        const body = await res.text();
+        const data = JSON.parse(body);
+        if (PERF) {
+            console.log(`[perf] payload ${body.length} bytes${data.unchanged ? ' (unchanged)' : ''}`);
+        }
         
-        for (const [workerId, payload] of Object.entries(data)) {
-            const row = document.querySelector(`tr[data-worker-id="${workerId}"]`);
-            if (!row) continue;
+        if (!data.unchanged) {
+            latestVersion = data.version;
             
-            const tempCell = row.querySelector('.temp');
-            const timeCell = row.querySelector('.time');
-            const statusCell = row.querySelector('.status');
+            let totalTemps = [];
+            let feverCount = 0;
             
-            if (payload.temperature_c !== null && payload.temperature_c !== undefined) {
-                const temp = Number(payload.temperature_c);
-                totalTemps.push(temp);
-                
-                // Update temperature display with elegant badge and visual thermometer
-                const tempIcon = tempCell.querySelector('i');
-                tempCell.innerHTML = `
-                    <div class="flex items-center space-x-3">
-                        <div class="temp-visual" style="background: linear-gradient(to top, 
-                            ${temp >= 38 ? '#ef4444' : temp >= 37.5 ? '#f59e0b' : '#10b981'} 0%, 
-                            ${temp >= 37 ? '#f59e0b' : '#10b981'} 50%, 
-                            #10b981 100%)"></div>
-                        <div>
-                            <span class="temp-indicator ${
-                                temp >= 38 ? 'temp-danger-badge' : 
-                                temp >= 37.5 ? 'temp-warning-badge' : 'temp-normal-badge'
-                            }">
-                                ${temp.toFixed(1)}°C
-                            </span>
-                            <p class="text-xs text-slate-500 mt-0.5">
-                                ${temp >= 38 ? 'Critical' : temp >= 37.5 ? 'Elevated' : 'Normal'}
-                            </p>
-                        </div>
-                    </div>
-                `;
-                
-                // Update time display
-                timeCell.innerHTML = `
-                    <div class="flex items-center space-x-2">
-                        <i class="fas fa-clock text-slate-400"></i>
-                        <span class="font-mono text-sm">${payload.recorded_local}</span>
-                    </div>
-                `;
+            for (let i = 0; i < data.worker_ids.length; i++) {
+                const workerId = data.worker_ids[i];
+                const temp = data.temps[i];
+                const time = data.times[i];
+                if (!getRowCells(workerId)) continue;
                 
-                // Update status badge
-                if (temp >= 38.0) {
-                    feverCount++;
-                    statusCell.innerHTML = `
-                        <span class="status-badge bg-red-100 text-red-700 border-red-200">
-                            <i class="fas fa-exclamation-triangle mr-1 animate-pulse"></i>
-                            Fever Alert
-                        </span>
-                    `;
-                    row.classList.add('fever-alert');
-                } else if (temp >= 37.5) {
-                    statusCell.innerHTML = `
-                        <span class="status-badge bg-amber-100 text-amber-700 border-amber-200">
-                            <i class="fas fa-eye mr-1"></i>
-                            Monitor
-                        </span>
-                    `;
-                    row.classList.remove('fever-alert');
-                } else {
-                    statusCell.innerHTML = `
-                        <span class="status-badge status-online">
-                            <i class="fas fa-check-circle mr-1"></i>
-                            Normal
-                        </span>
-                    `;
-                    row.classList.remove('fever-alert');
+                if (temp !== null && temp !== undefined) {
+                    totalTemps.push(Number(temp));
+                    if (Number(temp) >= 38.0) feverCount++;
                 }
                 
-                // Add visual feedback for data updates
-                tempCell.style.transform = 'scale(1.05)';
-                setTimeout(() => {
-                    tempCell.style.transform = 'scale(1)';
-                }, 300);
-                
-            } else {
-                tempCell.innerHTML = `
-                    <div class="flex items-center space-x-2">
-                        <i class="fas fa-thermometer-half text-slate-400"></i>
-                        <span class="text-slate-400">—</span>
-                    </div>
-                `;
-                timeCell.innerHTML = `
-                    <div class="flex items-center space-x-2">
-                        <i class="fas fa-clock text-slate-400"></i>
-                        <span class="text-slate-400">—</span>
-                    </div>
-                `;
-                statusCell.innerHTML = `
-                    <span class="status-badge bg-slate-100 text-slate-600 border-slate-200">
-                        <i class="fas fa-hourglass-half mr-1"></i>
-                        Waiting
-                    </span>
-                `;
-                row.classList.remove('fever-alert');
+                const previous = renderedRows.get(workerId);
+                if (previous && previous.temp === temp && previous.time === time) continue;
+                pendingRows.set(workerId, { temp, time });
             }
+            
+            pendingStats = { totalTemps, feverCount };
         }
         
-        // Update statistics
-        updateStatistics(totalTemps, feverCount);
-        
-        // Update last refresh indicator
-        updateLastRefresh();
+        scheduleRender();
         
         // Hide refresh indicator
         if (refreshIndicator) {
@@ -137,6 +92,127 @@ async function fetchLatest() {
     }
 }
 
+// Batch all DOM writes for one poll into a single animation frame
+function scheduleRender() {
+    if (frameRequested) return;
+    frameRequested = true;
+    requestAnimationFrame(() => {
+        frameRequested = false;
+        const started = performance.now();
+        const patched = pendingRows.size;
+        
+        for (const [workerId, values] of pendingRows) {
+            const cells = getRowCells(workerId);
+            if (!cells) continue;
+            if (values.temp !== null && values.temp !== undefined) {
+                renderReading(cells, Number(values.temp), values.time);
+            } else {
+                renderWaiting(cells);
+            }
+            renderedRows.set(workerId, values);
+        }
+        pendingRows.clear();
+        
+        if (pendingStats) {
+            updateStatistics(pendingStats.totalTemps, pendingStats.feverCount);
+            pendingStats = null;
+        }
+        
+        // Update last refresh indicator
+        updateLastRefresh();
+        
+        if (PERF) {
+            console.log(`[perf] frame ${(performance.now() - started).toFixed(2)} ms, ${patched} rows patched`);
+        }
+    });
+}
+
+function renderReading({ row, tempCell, timeCell, statusCell }, temp, recordedLocal) {
+    // Update temperature display with elegant badge and visual thermometer
+    tempCell.innerHTML = `
+        <div class="flex items-center space-x-3">
+            <div class="temp-visual" style="background: linear-gradient(to top, 
+                ${temp >= 38 ? '#ef4444' : temp >= 37.5 ? '#f59e0b' : '#10b981'} 0%, 
+                ${temp >= 37 ? '#f59e0b' : '#10b981'} 50%, 
+                #10b981 100%)"></div>
+            <div>
+                <span class="temp-indicator ${
+                    temp >= 38 ? 'temp-danger-badge' : 
+                    temp >= 37.5 ? 'temp-warning-badge' : 'temp-normal-badge'
+                }">
+                    ${temp.toFixed(1)}°C
+                </span>
+                <p class="text-xs text-slate-500 mt-0.5">
+                    ${temp >= 38 ? 'Critical' : temp >= 37.5 ? 'Elevated' : 'Normal'}
+                </p>
+            </div>
+        </div>
+    `;
+    
+    // Update time display
+    timeCell.innerHTML = `
+        <div class="flex items-center space-x-2">
+            <i class="fas fa-clock text-slate-400"></i>
+            <span class="font-mono text-sm">${recordedLocal}</span>
+        </div>
+    `;
+    
+    // Update status badge
+    if (temp >= 38.0) {
+        statusCell.innerHTML = `
+            <span class="status-badge bg-red-100 text-red-700 border-red-200">
+                <i class="fas fa-exclamation-triangle mr-1 animate-pulse"></i>
+                Fever Alert
+            </span>
+        `;
+        row.classList.add('fever-alert');
+    } else if (temp >= 37.5) {
+        statusCell.innerHTML = `
+            <span class="status-badge bg-amber-100 text-amber-700 border-amber-200">
+                <i class="fas fa-eye mr-1"></i>
+                Monitor
+            </span>
+        `;
+        row.classList.remove('fever-alert');
+    } else {
+        statusCell.innerHTML = `
+            <span class="status-badge status-online">
+                <i class="fas fa-check-circle mr-1"></i>
+                Normal
+            </span>
+        `;
+        row.classList.remove('fever-alert');
+    }
+    
+    // Add visual feedback for data updates
+    tempCell.style.transform = 'scale(1.05)';
+    setTimeout(() => {
+        tempCell.style.transform = 'scale(1)';
+    }, 300);
+}
+
+function renderWaiting({ row, tempCell, timeCell, statusCell }) {
+    tempCell.innerHTML = `
+        <div class="flex items-center space-x-2">
+            <i class="fas fa-thermometer-half text-slate-400"></i>
+            <span class="text-slate-400">—</span>
+        </div>
+    `;
+    timeCell.innerHTML = `
+        <div class="flex items-center space-x-2">
+            <i class="fas fa-clock text-slate-400"></i>
+            <span class="text-slate-400">—</span>
+        </div>
+    `;
+    statusCell.innerHTML = `
+        <span class="status-badge bg-slate-100 text-slate-600 border-slate-200">
+            <i class="fas fa-hourglass-half mr-1"></i>
+            Waiting
+        </span>
+    `;
+    row.classList.remove('fever-alert');
+}
+
 
 // Statistics and helper functions
 function updateStatistics(temperatures, feverCount) {
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the load generator and its fake ThingSpeak server.
+
+Everything runs locally (fake server + throwaway instance):
+    python3 test_loadgen.py
+"""
+
+import tempfile
+import time
+from collections import Counter
+import requests
+from loadgen import FIELDS, FakeThingSpeak, Stats, fleet_events, replay_via_sync
+
+
+def make_feed(entry_id, created_at, **fields):
+    feed = {'entry_id': entry_id, 'created_at': created_at}
+    feed.update({f'field{n}': fields.get(f'field{n}') for n in FIELDS})
+    return feed
+
+
+def test_fake_thingspeak_endpoints():
+    feeds = [
+        make_feed(1, '2025-01-01T08:00:00Z', field1='36.5'),
+        make_feed(2, '2025-01-01T08:00:10Z', field2='37.1'),
+        make_feed(3, '2025-01-01T10:00:00Z', field3='38.2'),
+    ]
+    # 10s of feed time per 10ms of wall time; entry 3 is two hours out
+    fake = FakeThingSpeak(feeds, warp=1000, channel_id='42').start()
+    try:
+        base = f"{fake.url}/channels/42"
+        time.sleep(0.05)
+        data = requests.get(f"{base}/feeds.json", params={'results': 10}, timeout=5).json()
+        assert [f['entry_id'] for f in data['feeds']] == [1, 2]
+        assert requests.get(f"{base}/feeds.json", params={'results': 1}, timeout=5).json()['feeds'][0]['entry_id'] == 2
+        assert requests.get(f"{base}/feeds/last.json", timeout=5).json()['entry_id'] == 2
+
+        entry_id = requests.post(f"{fake.url}/update", data={'api_key': 'x', 'field5': '36.9'}, timeout=5).json()
+        assert entry_id == 4
+        last = requests.get(f"{base}/feeds/last.json", timeout=5).json()
+        assert last['entry_id'] == 4 and last['field5'] == '36.9'
+        assert requests.get(f"{fake.url}/channels/99/feeds.json", timeout=5).status_code == 404
+    finally:
+        fake.stop()
+
+    empty = FakeThingSpeak(channel_id='42').start()
+    try:
+        assert requests.get(f"{empty.url}/channels/42/feeds/last.json", timeout=5).json() == -1
+    finally:
+        empty.stop()
+    print("✓ fake ThingSpeak serves feeds.json, feeds/last.json and /update")
+
+
+def test_fleet_events_per_interval():
+    devices, interval, duration = 5, 10.0, 30.0
+    events = fleet_events(devices, interval, jitter=1.0, duration=duration, seed=3)
+    assert len(events) == devices * len(FIELDS) * int(duration / interval)
+    assert [e[0] for e in events] == sorted(e[0] for e in events)
+
+    per_element = Counter(payload['element_id'] for _, payload in events)
+    assert len(per_element) == devices * len(FIELDS)
+    assert set(per_element.values()) == {int(duration / interval)}
+    print("✓ fleet_events yields devices x 8 fields per interval")
+
+
+def test_stats_percentile():
+    stats = Stats()
+    assert stats.percentile(99) == 0.0
+    for ms in range(1, 101):
+        stats.record(ms / 1000, 200)
+    stats.record(0.5, 500)
+    assert stats.percentile(0) == 0.001
+    assert stats.percentile(100) == 0.5
+    assert abs(stats.percentile(50) - 0.051) < 1e-9
+    assert stats.errors == 1 and stats.ok == 100 and stats.rows == 100
+    print("✓ Stats percentiles and error counts")
+
+
+def test_replay_via_sync_counts_skipped_entries():
+    feeds = [
+        make_feed(1, '2025-01-01T08:00:00Z', field1='36.5', field2='36.7'),
+        {'created_at': '2025-01-01T08:00:05Z', 'field1': '36.6'},  # no entry_id
+        make_feed(2, '2025-01-01T08:00:10Z', field1='37.0'),
+        make_feed(3, '2025-01-01T08:00:20Z'),  # all fields null, newest
+    ]
+    # Entries 2 and 3 arrive within one poll; last.json only shows entry 3,
+    # which has nothing to store, so entry 2 is skipped like in the service
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        stats = replay_via_sync(feeds, warp=100, poll=0.5, workdir=tmp)
+        assert time.perf_counter() - started < 10
+    assert stats.ok == 1 and stats.rows == 2
+    assert stats.errors == 1
+    print("✓ replay through sync_once() reports entries skipped between polls")
+
+
+def test_replay_via_sync_keeps_up_with_fast_polling():
+    feeds = [make_feed(n, f'2025-01-01T08:00:{n * 10:02d}Z', field1='36.5') for n in range(1, 4)]
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = replay_via_sync(feeds, warp=50, poll=0.02, workdir=tmp)
+    assert stats.ok == 3 and stats.errors == 0 and stats.rows == 3
+    print("✓ replay through sync_once() stores every entry when polling keeps up")
+
+
+def main():
+    print("🧪 Load generator tests")
+    print("-" * 50)
+    test_fake_thingspeak_endpoints()
+    test_fleet_events_per_interval()
+    test_stats_percentile()
+    test_replay_via_sync_counts_skipped_entries()
+    test_replay_via_sync_keeps_up_with_fast_polling()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Tests for the readings storage layer and its migration.
+
+Runs against throwaway SQLite databases, so no server is needed:
+    python3 test_readings_repo.py
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+from app import create_app
+from database import db
+from models import Reading
+import manage_readings
+import readings_repo
+
+
+def make_app(tmp, layout='monthly'):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'app.db')}",
+        'SPOOL_DIR': os.path.join(tmp, 'spool'),
+        'READINGS_LAYOUT': layout,
+        'TESTING': True,
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_legacy(app, count):
+    """Fill the single `readings` table with readings spread over months."""
+    base = datetime(2024, 1, 15)
+    with app.app_context():
+        for i in range(count):
+            db.session.add(Reading(element_id=str(i % 4 + 1), temperature_c=36.0 + i / 100,
+                                   recorded_at=base + timedelta(days=7 * i)))
+        db.session.commit()
+
+
+def test_month_boundary_routing():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        with app.app_context():
+            readings_repo.add_reading('1', 36.5, datetime(2024, 1, 31, 23, 59, 59, 999999))
+            readings_repo.add_reading('1', 36.6, datetime(2024, 2, 1, 0, 0, 0))
+            db.session.commit()
+            assert readings_repo.list_partitions() == ['readings_202401', 'readings_202402']
+
+            jan = readings_repo.readings_between(datetime(2024, 1, 1), datetime(2024, 2, 1))
+            assert [r.temperature_c for r in jan] == [36.5]
+    print("✓ readings on either side of a month boundary land in their own partition")
+
+
+def test_readings_between_spans_partitions():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        with app.app_context():
+            base = datetime(2024, 1, 20)
+            readings_repo.add_readings(
+                ('2' if i % 2 else '1', 36.0 + i / 10, base + timedelta(days=10 * i)) for i in range(8)
+            )
+            db.session.commit()
+            assert len(readings_repo.list_partitions()) == 3
+
+            rows = readings_repo.readings_between(datetime(2024, 2, 1), datetime(2024, 3, 15))
+            assert [r.recorded_at for r in rows] == sorted(r.recorded_at for r in rows)
+            assert len(rows) == 4
+            only_two = readings_repo.readings_between(datetime(2024, 1, 1), datetime(2024, 6, 1), element_id='2')
+            assert {r.element_id for r in only_two} == {'2'} and len(only_two) == 4
+    print("✓ readings_between merges and orders rows from several partitions")
+
+
+def test_drop_readings_before():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        with app.app_context():
+            for month in (1, 2, 3):
+                readings_repo.add_reading('1', 36.5, datetime(2024, month, 10))
+            db.session.commit()
+
+            # Mid-February cutoff only drops January, February is kept whole
+            assert readings_repo.drop_readings_before(datetime(2024, 2, 15)) == 1
+            db.session.commit()
+            assert readings_repo.list_partitions() == ['readings_202402', 'readings_202403']
+            assert len(readings_repo.readings_between(None, None)) == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, layout='single')
+        with app.app_context():
+            for month in (1, 2, 3):
+                readings_repo.add_reading('1', 36.5, datetime(2024, month, 10))
+            db.session.commit()
+            assert readings_repo.drop_readings_before(datetime(2024, 2, 15)) == 2
+            db.session.commit()
+            assert len(readings_repo.readings_between(None, None)) == 1
+    print("✓ drop_readings_before drops whole months (monthly) or rows (single)")
+
+
+def test_reading_exists_when_partition_missing():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        with app.app_context():
+            assert not readings_repo.reading_exists('1', datetime(2024, 5, 1))
+            assert readings_repo.list_partitions() == []
+            readings_repo.add_reading('1', 36.5, datetime(2024, 5, 1))
+            db.session.commit()
+            assert readings_repo.reading_exists('1', datetime(2024, 5, 1))
+            assert not readings_repo.reading_exists('1', datetime(2024, 6, 1))
+    print("✓ reading_exists is False for a month without a partition")
+
+
+def test_partitions_dropped_by_another_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        now = datetime.utcnow()
+        with app.app_context():
+            readings_repo.add_reading('1', 36.5, datetime(2024, 1, 10))
+            readings_repo.add_reading('1', 37.0, now)
+            db.session.commit()
+            readings_repo.list_partitions()
+
+        # A prune run in a different process drops January behind our back
+        conn = sqlite3.connect(os.path.join(tmp, 'app.db'))
+        conn.execute('DROP TABLE readings_202401')
+        conn.commit()
+        conn.close()
+
+        with app.app_context():
+            assert readings_repo.latest_reading('1').temperature_c == 37.0
+            assert readings_repo.latest_reading('9') is None
+            assert len(readings_repo.readings_between(None, None)) == 1
+            assert not readings_repo.reading_exists('1', datetime(2024, 1, 10))
+    print("✓ partitions dropped by another process are not queried")
+
+
+def test_latest_reading_window():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        with app.app_context():
+            readings_repo.add_reading('1', 36.5, datetime(2020, 1, 10))
+            for month in range(2, 13):
+                readings_repo.add_reading('2', 36.5, datetime(2020, month, 10))
+            db.session.commit()
+
+            with mock.patch.object(readings_repo, '_partition_table', wraps=readings_repo._partition_table) as spy:
+                assert readings_repo.latest_reading('1') is None
+            # Only the current and previous month are looked at
+            assert spy.call_count <= 2
+            assert readings_repo.latest_reading('1', since=datetime(2019, 1, 1)).temperature_c == 36.5
+    print("✓ latest_reading only scans the recent window of partitions")
+
+
+def test_latest_readings_reads_catalog_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        now = datetime.utcnow()
+        with app.app_context():
+            for element_id in ('1', '2', '3'):
+                readings_repo.add_reading(element_id, 36.5, now)
+            db.session.commit()
+
+            ids = [str(n) for n in range(1, 51)]
+            with mock.patch.object(readings_repo, '_catalog_partitions',
+                                   wraps=readings_repo._catalog_partitions) as spy:
+                latest = readings_repo.latest_readings(ids)
+            assert spy.call_count == 1
+            assert sorted(k for k, v in latest.items() if v is not None) == ['1', '2', '3']
+    print("✓ latest_readings reads the partition catalog once for all elements")
+
+
+def test_migrate_resumes_after_interruption():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        seed_legacy(app, 20)
+
+        calls = {'n': 0}
+        real_add = readings_repo.add_readings
+
+        def flaky_add(rows):
+            calls['n'] += 1
+            if calls['n'] == 3:
+                raise RuntimeError('killed')
+            return real_add(rows)
+
+        with app.app_context():
+            with mock.patch.object(readings_repo, 'add_readings', side_effect=flaky_add):
+                try:
+                    manage_readings.migrate(batch_size=4)
+                except RuntimeError:
+                    db.session.rollback()
+            assert Reading.query.count() == 12
+            assert len(readings_repo.readings_between(None, None)) == 8
+
+        with app.app_context():
+            manage_readings.migrate(batch_size=4)
+            assert Reading.query.count() == 0
+            rows = readings_repo.readings_between(None, None)
+            assert len(rows) == 20
+            assert len({(r.element_id, r.recorded_at) for r in rows}) == 20
+            assert len(readings_repo.list_partitions()) > 1
+    print("✓ migrate moves every reading once, even when re-run after an interruption")
+
+
+def main():
+    print("🧪 Readings repository tests")
+    print("-" * 50)
+    test_month_boundary_routing()
+    test_readings_between_spans_partitions()
+    test_drop_readings_before()
+    test_reading_exists_when_partition_missing()
+    test_partitions_dropped_by_another_process()
+    test_latest_reading_window()
+    test_latest_readings_reads_catalog_once()
+    test_migrate_resumes_after_interruption()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Fault-injection test for the readings spool.
+
+Runs against a throwaway SQLite database and spool directory, so no server
+or ThingSpeak access is needed:
+    python3 test_spool.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+from sqlalchemy.exc import DataError, OperationalError
+from app import create_app
+from database import db
+from spool import Spool, replay, reading_record, HEADER
+import readings_repo
+
+
+def make_app(tmp):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'app.db')}",
+        'SPOOL_DIR': os.path.join(tmp, 'spool'),
+        'TESTING': True,
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def locked_commit():
+    raise OperationalError('COMMIT', {}, Exception('database is locked'))
+
+
+def count_readings():
+    return len(readings_repo.readings_between(None, None))
+
+
+def test_ingest_spools_when_database_locked():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        client = app.test_client()
+        with mock.patch.object(db.session, 'commit', side_effect=locked_commit):
+            for temp in (36.5, 37.0, 38.4):
+                res = client.post('/api/ingest', json={'element_id': '1', 'temperature_c': temp})
+                assert res.status_code == 202, res.data
+                assert res.get_json()['status'] == 'spooled'
+
+        spool = Spool(app.config['SPOOL_DIR'])
+        with app.app_context():
+            assert count_readings() == 0
+            assert spool.pending() == 3
+            assert replay(spool) == 3
+            assert count_readings() == 3
+            assert spool.pending() == 0
+            # A second replay finds nothing new
+            assert replay(spool) == 0
+            assert count_readings() == 3
+    print("✓ ingest spools while the database is locked and replays once")
+
+
+def test_crash_between_commit_and_offset_has_no_duplicates():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        spool = Spool(app.config['SPOOL_DIR'])
+        base = datetime(2025, 1, 1)
+        spool.append_many([reading_record('2', 36.0 + i / 10, base + timedelta(seconds=i)) for i in range(10)])
+
+        with app.app_context():
+            # Commit succeeds, then the process "dies" before saving the offset
+            with mock.patch.object(Spool, 'save_offset', side_effect=RuntimeError('crash')):
+                try:
+                    replay(spool, batch_size=4)
+                except RuntimeError:
+                    pass
+            assert count_readings() == 4
+            assert spool.pending() == 10
+
+            assert replay(spool, batch_size=4) == 6
+            assert count_readings() == 10
+    print("✓ replay after a crash before the offset write does not duplicate readings")
+
+
+def test_duplicate_spooled_records_are_inserted_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        spool = Spool(app.config['SPOOL_DIR'])
+        rec = reading_record('5', 36.8, datetime(2025, 1, 2, 8))
+        # e.g. the sync service restarts while the database is still locked
+        spool.append_many([rec])
+        spool.append_many([rec])
+
+        with app.app_context():
+            assert replay(spool) == 1
+            assert count_readings() == 1
+    print("✓ a reading spooled twice is replayed once")
+
+
+def test_torn_and_corrupt_frames_are_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        spool = Spool(app.config['SPOOL_DIR'])
+        base = datetime(2025, 2, 1)
+        spool.append_reading('3', 36.1, base)
+
+        # Torn write: half a frame from a writer that died mid-append
+        path = os.path.join(spool.directory, spool.segments()[-1])
+        with open(path, 'ab') as f:
+            f.write(HEADER.pack(b'TSPL', 500, 0) + b'{"element_id":')
+        spool.append_reading('3', 36.2, base + timedelta(seconds=1))
+
+        # Flip a payload byte of the last record so its CRC no longer matches
+        spool.append_reading('3', 36.3, base + timedelta(seconds=2))
+        with open(path, 'r+b') as f:
+            f.seek(-3, os.SEEK_END)
+            f.write(b'X')
+
+        with app.app_context():
+            assert replay(spool) == 2
+            temps = [r.temperature_c for r in readings_repo.readings_between(None, None)]
+            assert temps == [36.1, 36.2]
+    print("✓ torn and corrupt frames are skipped without blocking later records")
+
+
+def test_segments_roll_over_and_are_removed_after_replay():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        spool = Spool(app.config['SPOOL_DIR'], segment_bytes=1024)
+        base = datetime(2025, 3, 1)
+        for i in range(100):
+            spool.append_reading(str(i % 8 + 1), 36.5, base + timedelta(seconds=i))
+        assert len(spool.segments()) > 1
+
+        with app.app_context():
+            assert replay(spool, batch_size=16) == 100
+        assert len(spool.segments()) == 1
+    print("✓ segments roll over and replayed segments are removed")
+
+
+def test_thingspeak_batch_spooled_when_database_locked():
+    from thingspeak_sync import ThingSpeakSync
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        sync = ThingSpeakSync.__new__(ThingSpeakSync)
+        sync.app = app
+        sync.last_entry_id = 0
+        sync.spool = Spool(app.config['SPOOL_DIR'])
+        feed = {'entry_id': 7, 'created_at': '2025-04-01T08:00:00Z', 'field1': '36.6', 'field2': '38.1'}
+
+        with app.app_context():
+            with mock.patch.object(db.session, 'commit', side_effect=locked_commit):
+                assert sync.process_reading(feed)
+            assert sync.last_entry_id == 7
+            assert count_readings() == 0
+
+            sync.replay_spool()
+            assert count_readings() == 2
+    print("✓ ThingSpeak batch is spooled instead of lost and replayed on the next sync")
+
+
+def test_ingest_drains_spool_after_recovery():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        app.config['SPOOL_DRAIN_INTERVAL'] = 0
+        client = app.test_client()
+        with mock.patch.object(db.session, 'commit', side_effect=locked_commit):
+            for temp in (36.5, 37.0):
+                assert client.post('/api/ingest', json={'element_id': '1', 'temperature_c': temp}).status_code == 202
+
+        # The first successful ingest also replays what was spooled
+        assert client.post('/api/ingest', json={'element_id': '1', 'temperature_c': 37.5}).status_code == 200
+        with app.app_context():
+            assert count_readings() == 3
+            assert not Spool(app.config['SPOOL_DIR']).has_pending()
+    print("✓ a successful ingest drains the spool without the sync service")
+
+
+def test_ingest_drains_one_batch_and_survives_replay_failure():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        app.config['SPOOL_DRAIN_INTERVAL'] = 0
+        app.config['SPOOL_DRAIN_BATCH'] = 10
+        spool = Spool(app.config['SPOOL_DIR'])
+        base = datetime(2025, 6, 1)
+        spool.append_many([reading_record('6', 36.5, base + timedelta(seconds=i)) for i in range(25)])
+        client = app.test_client()
+
+        # Each request replays at most one batch
+        assert client.post('/api/ingest', json={'element_id': '1', 'temperature_c': 37.0}).status_code == 200
+        with app.app_context():
+            assert count_readings() == 11
+        assert spool.pending() == 15
+
+        # A failing replay is logged; the committed reading still gets a 200
+        with mock.patch('ingest.replay', side_effect=RuntimeError('boom')):
+            res = client.post('/api/ingest', json={'element_id': '1', 'temperature_c': 37.1})
+        assert res.status_code == 200 and res.get_json()['status'] == 'ok'
+        with app.app_context():
+            assert count_readings() == 12
+    print("✓ ingest replays one batch per request and ignores replay failures")
+
+
+def test_unwritable_spool_returns_503():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        client = app.test_client()
+        read_only = OSError(30, 'Read-only file system')
+        with mock.patch.object(db.session, 'commit', side_effect=locked_commit), \
+                mock.patch.object(Spool, 'append_many', side_effect=read_only):
+            res = client.post('/api/ingest', json={'element_id': '1', 'temperature_c': 36.5})
+        assert res.status_code == 503
+        assert res.get_json()['status'] == 'error'
+    print("✓ ingest answers 503 when neither the database nor the spool can be written")
+
+
+def test_non_transient_errors_are_not_spooled():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp)
+        app.config['PROPAGATE_EXCEPTIONS'] = False
+        client = app.test_client()
+        bad = DataError('INSERT', {}, Exception('value too long for type character varying(64)'))
+        with mock.patch.object(readings_repo, 'add_reading', side_effect=bad):
+            res = client.post('/api/ingest', json={'element_id': 'x' * 80, 'temperature_c': 36.5})
+        assert res.status_code == 500
+        assert not Spool(app.config['SPOOL_DIR']).has_pending()
+    print("✓ non-transient database errors return 500 instead of being spooled")
+
+
+def test_cli_status_and_replay():
+    with tempfile.TemporaryDirectory() as tmp:
+        spool_dir = os.path.join(tmp, 'spool')
+        spool = Spool(spool_dir)
+        spool.append_reading('4', 36.9, datetime(2025, 5, 1))
+        spool.close()
+
+        app = make_app(tmp)
+        env = dict(os.environ, DB_URL=app.config['SQLALCHEMY_DATABASE_URI'], SPOOL_DIR=spool_dir)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool.py')
+
+        status = subprocess.run([sys.executable, script], env=env, capture_output=True, text=True)
+        assert status.returncode == 0, status.stderr
+        assert 'Pending records: 1' in status.stdout
+
+        replayed = subprocess.run([sys.executable, script, '--replay'], env=env, capture_output=True, text=True)
+        assert replayed.returncode == 0, replayed.stderr
+        assert 'Replayed 1 spooled readings' in replayed.stdout
+        with app.app_context():
+            assert count_readings() == 1
+    print("✓ spool.py status and --replay commands work")
+
+
+def main():
+    print("🧪 Spool fault-injection tests")
+    print("-" * 50)
+    test_ingest_spools_when_database_locked()
+    test_crash_between_commit_and_offset_has_no_duplicates()
+    test_duplicate_spooled_records_are_inserted_once()
+    test_torn_and_corrupt_frames_are_skipped()
+    test_segments_roll_over_and_are_removed_after_replay()
+    test_thingspeak_batch_spooled_when_database_locked()
+    test_ingest_drains_spool_after_recovery()
+    test_ingest_drains_one_batch_and_survives_replay_failure()
+    test_unwritable_spool_returns_503()
+    test_non_transient_errors_are_not_spooled()
+    test_cli_status_and_replay()
+
+
+if __name__ == '__main__':
+    main()
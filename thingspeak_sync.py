@@ -10,16 +10,19 @@ import json
 from datetime import datetime, timedelta
 from config import Config
 from app import create_app
+from sqlalchemy.exc import OperationalError
 from database import db
-from models import Reading
+from spool import get_spool, reading_record, replay
+import readings_repo
 
 class ThingSpeakSync:
-    def __init__(self):
-        self.app = create_app()
-        self.channel_id = "3022640"  # From your ThingSpeak URL
+    def __init__(self, app=None):
+        self.app = app or create_app()
+        self.channel_id = self.app.config['THINGSPEAK_CHANNEL_ID']  # From your ThingSpeak URL
         self.read_api_key = Config.THINGSPEAK_READ_API_KEY
-        self.base_url = f"https://api.thingspeak.com/channels/{self.channel_id}"
+        self.base_url = f"{self.app.config['THINGSPEAK_URL']}/channels/{self.channel_id}"
         self.last_entry_id = self.get_last_processed_entry_id()
+        self.spool = get_spool(self.app.config.get('SPOOL_DIR'))
         
     def get_last_processed_entry_id(self):
         """Get the last processed entry ID to avoid duplicates"""
@@ -81,7 +84,7 @@ class ThingSpeakSync:
             return False
             
         # Process each field (field1, field2, etc.)
-        readings_added = 0
+        parsed = []
         for field_num in range(1, 9):
             field_key = f'field{field_num}'
             if field_key in feed_data and feed_data[field_key] is not None:
@@ -91,38 +94,57 @@ class ThingSpeakSync:
                     
                     # Parse ThingSpeak timestamp
                     ts = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    
-                    # Check if this reading already exists
-                    existing = Reading.query.filter_by(
-                        element_id=element_id,
-                        recorded_at=ts
-                    ).first()
-                    
-                    if not existing:
-                        reading = Reading(
-                            element_id=element_id,
-                            temperature_c=temperature,
-                            recorded_at=ts
-                        )
-                        db.session.add(reading)
-                        readings_added += 1
-                        print(f"Added reading: Element {element_id} = {temperature}°C at {ts}")
+                    parsed.append((element_id, temperature, ts))
                         
                 except (ValueError, TypeError) as e:
                     print(f"Error processing {field_key}: {e}")
                     continue
         
+        readings_added = 0
+        try:
+            for element_id, temperature, ts in parsed:
+                # Check if this reading already exists
+                if not readings_repo.reading_exists(element_id, ts):
+                    readings_repo.add_reading(element_id, temperature, ts)
+                    readings_added += 1
+                    print(f"Added reading: Element {element_id} = {temperature}°C at {ts}")
+            
+            if readings_added > 0:
+                db.session.commit()
+        except OperationalError as e:
+            # Database locked or read-only: spool the batch, replay dedupes it later
+            db.session.rollback()
+            try:
+                self.spool.append_many([reading_record(*reading) for reading in parsed])
+                print(f"Database unavailable ({e}); spooled {len(parsed)} readings")
+                readings_added = len(parsed)
+            except OSError as spool_error:
+                # Leave last_entry_id alone so the entry is fetched again next cycle
+                print(f"Database and spool unavailable ({e}; {spool_error}); entry {entry_id} not stored")
+        
         if readings_added > 0:
-            db.session.commit()
             self.last_entry_id = max(self.last_entry_id, entry_id)
             
         return readings_added > 0
     
+    def replay_spool(self):
+        """Replay spooled readings; leaves them in place if the database is still down"""
+        try:
+            replayed = replay(self.spool)
+            if replayed:
+                print(f"Replayed {replayed} spooled readings")
+        except OperationalError as e:
+            db.session.rollback()
+            print(f"Spool replay deferred, database unavailable: {e}")
+    
     def sync_once(self):
         """Perform a single sync operation"""
         print(f"Syncing ThingSpeak data at {datetime.now()}")
         
         with self.app.app_context():
+            # Drain anything spooled while the database was unavailable
+            self.replay_spool()
+            
             # Fetch latest readings
             feeds = self.fetch_single_latest()
             
@@ -1,15 +1,17 @@
 # -------------------------------------------------
 # views.py (web views + JSON for dashboard)
 # -------------------------------------------------
+import json
+import zlib
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
 from werkzeug.security import check_password_hash
 from database import db
-from models import Admin, DailyCheckin, Reading, today_date_str
+from models import Admin, DailyCheckin, today_date_str
 from auth import login_required
-from sqlalchemy import func, desc
 from datetime import datetime
 from pytz import timezone
 from config import Config
+import readings_repo
 
 
 bp_views = Blueprint('views', __name__)
@@ -103,26 +105,44 @@ def checkin_post():
 
 @bp_views.get('/api/today/latest')
 def api_today_latest():
-    """API endpoint for dashboard to fetch latest temperature readings."""
+    """API endpoint for dashboard to fetch latest temperature readings.
+
+    `?format=columns` returns parallel arrays (worker_ids, temps, times) plus a
+    version; passing that version back as `?since=` returns only
+    {"version", "unchanged": true} while nothing has changed.
+    """
     date_str = today_date_str()
     checkins = DailyCheckin.query.filter_by(date_str=date_str).all()
     
-    result = {}
+    # Most recent reading per element_id, looked up in one pass
+    latest = readings_repo.latest_readings({checkin.element_id for checkin in checkins})
+
+    worker_ids, temps, times = [], [], []
     for checkin in checkins:
-        # Get the most recent reading for this element_id
-        latest_reading = Reading.query.filter_by(element_id=checkin.element_id).order_by(desc(Reading.recorded_at)).first()
+        latest_reading = latest[checkin.element_id]
+        worker_ids.append(checkin.worker_id)
         
         if latest_reading:
             # Convert UTC to local time
             recorded_local = latest_reading.recorded_at.replace(tzinfo=timezone('UTC')).astimezone(TZ)
-            result[checkin.worker_id] = {
-                'temperature_c': latest_reading.temperature_c,
-                'recorded_local': recorded_local.strftime('%H:%M:%S')
-            }
+            temps.append(latest_reading.temperature_c)
+            times.append(recorded_local.strftime('%H:%M:%S'))
         else:
-            result[checkin.worker_id] = {
-                'temperature_c': None,
-                'recorded_local': None
-            }
+            temps.append(None)
+            times.append(None)
+    
+    if request.args.get('format') == 'columns':
+        columns = {'worker_ids': worker_ids, 'temps': temps, 'times': times}
+        version = format(zlib.crc32(json.dumps(columns, separators=(',', ':')).encode()), 'x')
+        if request.args.get('since') == version:
+            return jsonify({'version': version, 'unchanged': True})
+        return jsonify({'version': version, **columns})
+    
+    result = {}
+    for worker_id, temp, recorded_local in zip(worker_ids, temps, times):
+        result[worker_id] = {
+            'temperature_c': temp,
+            'recorded_local': recorded_local
+        }
     
     return jsonify(result)